@@ -4,6 +4,7 @@ import wavio
 import tempfile
 import os
 import queue
+import threading
 
 class AudioRecorder:
     def __init__(self, samplerate=16000, channels=1, device_index=None):
@@ -12,6 +13,8 @@ class AudioRecorder:
         self.device_index = device_index
         self.recording = False
         self.audio_queue = queue.Queue()
+        self.chunks = []
+        self._chunks_lock = threading.Lock() # snapshot() may run on another thread
         self.filename = os.path.join(tempfile.gettempdir(), "whisper_clip_recording.wav")
 
     @staticmethod
@@ -38,6 +41,7 @@ class AudioRecorder:
     def start_recording(self):
         self.recording = True
         self.audio_queue = queue.Queue() # Clear queue
+        self.chunks = []
         try:
             self.stream = sd.InputStream(
                 samplerate=self.samplerate,
@@ -50,6 +54,32 @@ class AudioRecorder:
             print(f"Failed to start recording stream: {e}")
             self.recording = False
 
+    def _drain_queue(self):
+        try:
+            while not self.audio_queue.empty():
+                self.chunks.append(self.audio_queue.get())
+        except Exception as e:
+             print(f"Error reading queue: {e}")
+
+    def snapshot(self, start=0):
+        """
+        Returns the audio recorded so far, from sample `start` on, as a mono
+        float32 array, without stopping. Chunks wholly before `start` are not copied.
+        """
+        with self._chunks_lock:
+            self._drain_queue()
+            chunks = list(self.chunks)
+        offset = 0
+        for i, chunk in enumerate(chunks):
+            if offset + len(chunk) > start:
+                chunks = chunks[i:]
+                break
+            offset += len(chunk)
+        else:
+            return None
+        data = np.concatenate(chunks, axis=0).flatten().astype(np.float32)
+        return data[(start - offset) * self.channels:]
+
     def stop_recording(self):
         try:
             if hasattr(self, 'stream'):
@@ -61,12 +91,10 @@ class AudioRecorder:
         self.recording = False
         
         # Collect all data from queue
-        data = []
-        try:
-            while not self.audio_queue.empty():
-                data.append(self.audio_queue.get())
-        except Exception as e:
-             print(f"Error reading queue: {e}")
+        with self._chunks_lock:
+            self._drain_queue()
+            data = self.chunks
+            self.chunks = []
         
         if not data:
             print("No audio data collected.")
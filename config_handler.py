@@ -7,8 +7,23 @@ DEFAULT_CONFIG = {
     "app_name": "HelpMyToAnswer",
     "whisper_model": "base",
     "device": "auto",  # options: "auto", "cpu", "cuda"
+    "whisper_cascade": [],  # e.g. ["tiny", "base", "small"] (small to large) to pick a model per clip; replaces whisper_model
+    "cascade_latency_budget": 2.0,  # fixed seconds a clip's transcription may take...
+    "cascade_latency_budget_rtf": 0.5,  # ...plus this many seconds per second of speech
+    "cascade_escalate": True,  # re-run low-confidence results on the largest loaded model
+    "whisper_cache": True,  # load from a pre-converted, memory-mapped checkpoint cache
+    "whisper_cache_dir": "",  # empty = ~/.cache/helpmytoanswer/whisper
     "use_ollama": True,
     "ollama_model": "llama3",
+    "ollama_system_prompt": True,  # fixed system prompt so Ollama can reuse the prompt prefix
+    "ollama_keep_alive": "30m",  # how long Ollama keeps the model loaded after a request
+    "ollama_keep_warm_interval": 240,  # seconds of idle between keep-warm pings, 0 to disable
+    "fast_cleanup": True,  # rule-based cleanup for short/clean text instead of Ollama
+    "fast_cleanup_short_words": 8,  # at or below this many words, never call Ollama
+    "fast_cleanup_max_words": 40,  # above this many words, always call Ollama
+    "fast_cleanup_max_disfluencies": 2,  # fillers/repeats tolerated in between
+    "incremental_refine": True,  # refine finished sentences while still recording
+    "incremental_refine_interval": 3.0,  # seconds between speculative transcriptions
     "hotkey": "ctrl+alt+r"
 }
 
@@ -2,6 +2,7 @@ import sys
 import os
 import time
 import logging
+import queue
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
                              QTextEdit, QLabel, QPushButton, QComboBox, QCheckBox, 
                              QTabWidget, QSplitter, QListWidget, QListWidgetItem)
@@ -12,6 +13,8 @@ from PyQt6.QtGui import QFont, QColor, QPalette, QAction
 from audio_recorder import AudioRecorder
 from transcriber import Transcriber
 from history_manager import HistoryManager
+from notifications import get_dispatcher
+from transcript_view import TranscriptView
 import keyboard
 import os 
 import sys
@@ -33,75 +36,145 @@ def exception_hook(exctype, value, traceback):
 
 sys.excepthook = exception_hook
 
+# Models the "Auto" size choice cascades over, small to large
+AUTO_CASCADE = ["tiny", "base", "small", "medium"]
+
 class TranscriptionWorker(QThread):
+    """
+    One long-lived worker per session. The thread blocks on a command queue and
+    handles start/stop requests in order, reusing the recorder and the loaded
+    model across recordings.
+    """
     # Signals
-    partial_result = pyqtSignal(str, str) # text, stability (h1, h3, h5)
-    status_update = pyqtSignal(str)       # For status labels/logs, NOT transcript
-    finished = pyqtSignal()
+    # Both carry the recording id given to start_recording(), so the UI can drop stale results
+    partial_result = pyqtSignal(int, str, str) # recording id, text, stability (h1, h3, h5)
+    recording_finished = pyqtSignal(int)  # One per start_recording(), after the result (if any)
 
     def __init__(self, model_size="base", device="cpu", input_device_index=None, language=None):
         super().__init__()
-        self.is_running = False
-        self.input_device_index = input_device_index
-        self.recorder = AudioRecorder(device_index=self.input_device_index)
+        self.is_recording = False
+        self.recorder = AudioRecorder(device_index=input_device_index)
         self.model_size = model_size
         self.device = device
         self.language = language
         self.transcriber = None # Lazy load
+        self.recording_id = 0
+        self._commands = queue.Queue()
 
-    def run(self):
-        try:
-            self.is_running = True
-            
-            # Initialize resources if needed
-            if not self.transcriber:
-                self.status_update.emit("Loading Model...")
-                try:
-                    self.transcriber = Transcriber(model_size=self.model_size, device=self.device)
-                    self.status_update.emit("Model Loaded. Ready.")
-                except Exception as e:
-                    logging.error(f"Model load error: {e}")
-                    self.status_update.emit(f"Error loading model: {e}")
-                    return
+    # Called from the UI thread
+    def start_recording(self, model_size=None, input_device_index=None, language=None, recording_id=0):
+        self._commands.put(("start", (model_size or self.model_size, input_device_index, language, recording_id)))
 
-            # Start recording
+    def stop_recording(self):
+        self._commands.put(("stop", None))
+
+    def shutdown(self):
+        # Waits for any transcription still queued ahead of the quit; Qt must not destroy a running QThread
+        self._commands.put(("quit", None))
+        self.wait()
+
+    def _publish(self, message, kind="status"):
+        # Status reaches the window only through the shared notification pipeline (no toast: the window is visible)
+        get_dispatcher().publish(message, kind=kind, toast=False)
+
+    def run(self):
+        while True:
+            command, args = self._commands.get()
             try:
-                self.recorder.start_recording()
-                self.status_update.emit("Listening...")
+                if command == "start":
+                    self._handle_start(*args)
+                elif command == "stop":
+                    self._handle_stop()
+                elif command == "quit":
+                    if self.transcriber:
+                        self.transcriber.close()
+                    if self.is_recording:
+                        self.recorder.stop_recording()
+                        self.is_recording = False
+                    return
             except Exception as e:
-                 logging.error(f"Recording start error: {e}")
-                 self.status_update.emit(f"Mic Error: {e}")
-                 return
-            
-            while self.is_running:
-                time.sleep(0.1)
-                
-            # Stop and Transcribe Final
-            try:
-                audio_path = self.recorder.stop_recording()
-                if audio_path:
-                    self.status_update.emit("Transcribing...")
-                    # Update UI to show we are processing (optional visual cue in transcript if needed, but keeping clean for now)
-                    text = self.transcriber.transcribe(audio_path, language=self.language)
-                    if text:
-                        self.partial_result.emit(text, "h5")
-                        self.status_update.emit("Done.")
-                    else:
-                        self.status_update.emit("No speech detected.")
+                logging.critical(f"Worker command '{command}' failed: {e}", exc_info=True)
+                self.is_recording = False
+                self.recording_finished.emit(self.recording_id)
+
+    def _load_model(self, model_size):
+        if self.transcriber and model_size == self.model_size:
+            return True
+        self._publish("Loading Model...")
+        if self.transcriber:
+            # Cancels any pending cascade loads of the previous choice
+            self.transcriber.close()
+        self.transcriber = None
+        try:
+            if model_size == "auto":
+                # Per-clip model choice under the default budget (2 s + 0.5 s per second of speech):
+                # "tiny" loads now, larger ones (up to "medium" for long or hard clips) once a clip needs them
+                self.transcriber = Transcriber(model_size=AUTO_CASCADE[0], device=self.device,
+                                               cascade=AUTO_CASCADE, on_status=self._publish)
+            else:
+                self.transcriber = Transcriber(model_size=model_size, device=self.device)
+            self.model_size = model_size
+            self._publish("Model Loaded. Ready.")
+            return True
+        except Exception as e:
+            logging.error(f"Model load error: {e}")
+            self._publish(f"Error loading model: {e}", kind="error")
+            return False
+
+    def _handle_start(self, model_size, input_device_index, language, recording_id):
+        if self.is_recording:
+            logging.debug("Start ignored, already recording")
+            return
+
+        self.recording_id = recording_id
+        self.language = language
+        if not self._load_model(model_size):
+            self.recording_finished.emit(recording_id)
+            return
+
+        # Start recording
+        try:
+            self.recorder.device_index = input_device_index
+            self.recorder.start_recording()
+            if not self.recorder.recording:
+                raise RuntimeError("input stream did not start")
+            self.is_recording = True
+            self._publish("Listening...")
+        except Exception as e:
+             logging.error(f"Recording start error: {e}")
+             self._publish(f"Mic Error: {e}", kind="error")
+             self.recording_finished.emit(recording_id)
+
+    def _handle_stop(self):
+        if not self.is_recording:
+            logging.debug("Stop ignored, not recording")
+            return
+        self.is_recording = False
+
+        # Stop and Transcribe Final
+        try:
+            audio_path = self.recorder.stop_recording()
+            if audio_path:
+                self._publish("Transcribing...")
+                # Update UI to show we are processing (optional visual cue in transcript if needed, but keeping clean for now)
+                text = self.transcriber.transcribe(audio_path, language=self.language)
+                if text:
+                    self.partial_result.emit(self.recording_id, text, "h5")
+                    self._publish("Done.", kind="result")
                 else:
-                    logging.warning("No audio path returned from stop_recording")
-            except Exception as e:
-                 logging.error(f"Transcribe/Stop error: {e}", exc_info=True)
-                 self.status_update.emit(f"Error: {e}")
-        
+                    self._publish("No speech detected.", kind="result")
+            else:
+                logging.warning("No audio path returned from stop_recording")
         except Exception as e:
-            logging.critical(f"Worker thread crash: {e}", exc_info=True)
+             logging.error(f"Transcribe/Stop error: {e}", exc_info=True)
+             self._publish(f"Error: {e}", kind="error")
         finally:
-            self.finished.emit()
-            
-    # ... rest of worker ...
+            self.recording_finished.emit(self.recording_id)
 
 class MainWindow(QMainWindow):
+    # Bridges dispatcher-thread pipeline events to the UI thread
+    pipeline_event = pyqtSignal(str, str) # kind, message
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle("HelpMyToAnswer V2")
@@ -111,6 +184,7 @@ class MainWindow(QMainWindow):
         # Backend Worker
         self.worker = None
         self.is_recording = False
+        self.recording_id = 0 # Bumped per recording; worker signals for older ids are stale
         self.history_manager = HistoryManager()
         
         # Main Layout
@@ -139,9 +213,9 @@ class MainWindow(QMainWindow):
             pass
             
         self.model_combo = QComboBox()
-        self.model_combo.addItems(["Tiny", "Base", "Small", "Medium"])
+        self.model_combo.addItems(["Auto", "Tiny", "Base", "Small", "Medium"])
         self.model_combo.setCurrentText("Base")
-        self.model_combo.setToolTip("Model Size (Small/Medium = Better Quality, Slower)")
+        self.model_combo.setToolTip("Model Size (Small/Medium = Better Quality, Slower; Auto = picked per clip)")
 
         self.lang_combo = QComboBox()
         self.lang_combo.addItems(["Auto", "UK", "EN", "RU"])
@@ -170,8 +244,7 @@ class MainWindow(QMainWindow):
         left_layout = QVBoxLayout(left_widget)
         left_layout.setContentsMargins(0, 0, 0, 0)
         left_layout.addWidget(QLabel("LIVE TRANSCRIPT"))
-        self.transcript_area = QTextEdit()
-        self.transcript_area.setReadOnly(True)
+        self.transcript_area = TranscriptView()
         self.transcript_area.setPlaceholderText("Press Start or Ctrl+Space to speak...")
         self.transcript_area.setStyleSheet("font-family: Consolas; font-size: 11pt;")
         left_layout.addWidget(self.transcript_area)
@@ -237,6 +310,24 @@ class MainWindow(QMainWindow):
         except:
             pass # Handle gracefully if it fails
 
+        # Subscribe to the shared notification pipeline (same events the tray app toasts)
+        self.pipeline_event.connect(self.on_pipeline_event)
+        get_dispatcher().subscribe(self._forward_pipeline_event)
+
+    def _forward_pipeline_event(self, event):
+        # Called on the dispatcher thread
+        self.pipeline_event.emit(event.kind, event.message)
+
+    def on_pipeline_event(self, kind, message):
+        # Worker status arrives here via the dispatcher, coalesced like the tray toasts
+        self.update_status(message)
+
+    def closeEvent(self, event):
+        get_dispatcher().unsubscribe(self._forward_pipeline_event)
+        if self.worker:
+            self.worker.shutdown()
+        super().closeEvent(event)
+
     def remote_toggle_recording(self):
         # Called from background thread by keyboard lib, need to bridge to UI thread
         # PyQT updates must happen on UI thread.
@@ -256,6 +347,7 @@ class MainWindow(QMainWindow):
         self.status_label.setStyleSheet("color: red; font-weight: bold;")
         self.btn_record.setText("Stop Recording (Ctrl+Space)")
         
+        self.recording_id += 1
         self.transcript_area.clear()
         
         # Get selected mic index
@@ -274,12 +366,14 @@ class MainWindow(QMainWindow):
         # Get Model Size
         self.model_size = self.model_combo.currentText().lower()
 
-        # Start Worker
-        self.worker = TranscriptionWorker(model_size=self.model_size, device="cpu", input_device_index=selected_mic, language=selected_lang)
-        self.worker.partial_result.connect(self.update_transcript)
-        self.worker.status_update.connect(self.update_status) # New signal
-        self.worker.finished.connect(self.on_worker_finished)
-        self.worker.start()
+        # Start Worker (created once, then reused for every recording)
+        if not self.worker:
+            self.worker = TranscriptionWorker(model_size=self.model_size, device="cpu")
+            self.worker.partial_result.connect(self.update_transcript)
+            self.worker.recording_finished.connect(self.on_worker_finished)
+            self.worker.start()
+        self.worker.start_recording(model_size=self.model_size, input_device_index=selected_mic,
+                                    language=selected_lang, recording_id=self.recording_id)
 
     def update_status(self, msg):
         self.status_label.setText(msg)
@@ -296,13 +390,19 @@ class MainWindow(QMainWindow):
         self.btn_record.setText("Start Recording (Ctrl+Space)")
         
         if self.worker:
-            self.worker.stop()
-            # We don't wait() here to avoid freezing UI, let functionality finish gracefully
+            self.worker.stop_recording()
+            # We don't wait() here to avoid freezing UI, the worker emits recording_finished when done
 
-    def on_worker_finished(self):
-        self.worker = None
+    def on_worker_finished(self, recording_id):
+        if recording_id != self.recording_id:
+            # An earlier recording finishing after a new one started; its result went to history already
+            return
+        if self.is_recording:
+            # The worker gave up before recording (mic or model load failure): leave the recording state
+            self.is_recording = False
+            self.btn_record.setText("Start Recording (Ctrl+Space)")
         # Save to history if we have text
-        current_text = self.transcript_area.toPlainText().strip()
+        current_text = self.transcript_area.plain_text().strip()
         if current_text:
              self.history_manager.add_entry(current_text)
              self.refresh_history_ui()
@@ -321,13 +421,14 @@ class MainWindow(QMainWindow):
 
     def on_history_item_double_clicked(self, item):
         full_text = item.data(Qt.ItemDataRole.UserRole)
-        self.transcript_area.setText(full_text)
+        self.transcript_area.clear()
+        self.transcript_area.submit(full_text, "h5")
         self.update_status("Loaded from History")
         # Also switch to Variant A tab if needed, or just let user see it in transcript area
         # self.status_label.setText("Done")
 
     def copy_to_clipboard(self):
-        text = self.transcript_area.toPlainText()
+        text = self.transcript_area.plain_text()
         QApplication.clipboard().setText(text)
 
     def apply_styles(self):
@@ -342,22 +443,17 @@ class MainWindow(QMainWindow):
             QTabBar::tab:selected { background: #4c5052; font-weight: bold; }
         """)
 
-    def update_transcript(self, text, stability="final"):
-        if stability == "h1":
-            color = "#808080" # Grey
-        elif stability == "h3":
-            color = "#a0a0a0" # Darker Grey
-        else:
-            color = "#ffffff" # White
-            
-        cursor = self.transcript_area.textCursor()
-        # For this simple log version, we append. In streaming reset, we would replace info.
-        # Just appending with color for now
-        html = f'<span style="color: {color};">{text} </span>'
-        cursor.insertHtml(html)
-        cursor.insertBlock() # New line for clarity in this version
-        self.transcript_area.setTextCursor(cursor)
-        self.transcript_area.ensureCursorVisible()
+    def update_transcript(self, recording_id, text, stability="final"):
+        if recording_id != self.recording_id:
+            # Result of an earlier recording that arrived after a new one started: keep it out of
+            # the new transcript, but don't lose it
+            if stability == "h5" and text.strip():
+                self.history_manager.add_entry(text.strip())
+                self.refresh_history_ui()
+            return
+        # Partials (h1/h3) replace the unstable tail, final results are committed.
+        # The view batches signals to frame rate, so this is cheap to call often.
+        self.transcript_area.submit(text, stability)
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
@@ -6,9 +6,10 @@ import torch
 import logging
 from audio_recorder import AudioRecorder
 from transcriber import Transcriber
-from post_processing import TextRefiner
+from post_processing import TextRefiner, IncrementalRefiner, RefinementRouter
 from config_handler import load_config
 from utils import copy_to_clipboard, notify_user
+from notifications import get_dispatcher
 import ctypes
 from pystray import Icon, MenuItem as item
 from PIL import Image, ImageDraw
@@ -40,6 +41,9 @@ def is_already_running():
         return True
     return False
 
+# Longest stretch of audio the speculative pass re-transcribes without a sentence boundary
+SPECULATIVE_MAX_WINDOW = 30
+
 def create_image():
     # Create an icon image programmatically
     width = 64
@@ -75,18 +79,83 @@ def main():
         logging.info(f"Using device: {device}")
 
         recorder = AudioRecorder()
-        transcriber = Transcriber(model_size=config.get("whisper_model", "base"), device=device)
+        transcriber = Transcriber(
+            model_size=config.get("whisper_model", "base"),
+            device=device,
+            use_cache=config.get("whisper_cache", True),
+            cache_dir=config.get("whisper_cache_dir") or None,
+            cascade=config.get("whisper_cascade", []),
+            latency_budget=config.get("cascade_latency_budget", 2.0),
+            latency_budget_rtf=config.get("cascade_latency_budget_rtf", 0.5),
+            escalate=config.get("cascade_escalate", True)
+        )
         
         refiner = None
         if config.get("use_ollama", True):
-            refiner = TextRefiner(model=config.get("ollama_model", "llama3"))
+            refiner = TextRefiner(
+                model=config.get("ollama_model", "llama3"),
+                use_system_prompt=config.get("ollama_system_prompt", True),
+                keep_alive=config.get("ollama_keep_alive", "30m"),
+                keep_warm_interval=config.get("ollama_keep_warm_interval", 240)
+            )
             logging.info("Ollama refiner initialized")
+            if config.get("fast_cleanup", True):
+                refiner = RefinementRouter(
+                    refiner,
+                    short_words=config.get("fast_cleanup_short_words", 8),
+                    max_words=config.get("fast_cleanup_max_words", 40),
+                    max_disfluencies=config.get("fast_cleanup_max_disfluencies", 2)
+                )
+                logging.info("Local cleanup fast path enabled")
+
+        incremental = None
+        if refiner and config.get("incremental_refine", True):
+            incremental = IncrementalRefiner(refiner)
+            logging.info("Incremental refinement enabled")
+        speculative_interval = config.get("incremental_refine_interval", 3.0)
         
         is_recording = False
         last_hotkey_time = 0
+        # Whisper is not safe to call concurrently; the speculative pass and the final pass share it
+        transcribe_lock = threading.Lock()
+        speculative_stop = threading.Event()
+
+        # Samples of the current recording already transcribed and handed to the refiner
+        speculative_progress = {"committed": 0}
+
+        def speculative_loop(stop_event, progress):
+            # Transcribe only the audio after the last committed sentence boundary, so each
+            # pass stays short; the final pass then only decodes what comes after it
+            while not stop_event.wait(speculative_interval):
+                audio = recorder.snapshot(start=progress["committed"])
+                if audio is None or len(audio) < recorder.samplerate:
+                    continue
+                with transcribe_lock:
+                    if stop_event.is_set():
+                        return
+                    result = transcriber.transcribe_result(audio)
+                    # Re-check under the lock: finish()/reset() may already have run for this recording
+                    if stop_event.is_set():
+                        return
+                    if not result:
+                        continue
+                    segments = result.get("segments") or []
+                    # Commit up to the last segment that ends a sentence, never the one still being spoken
+                    boundary = None
+                    for i, segment in enumerate(segments[:-1]):
+                        if segment["text"].strip().endswith((".", "!", "?", "…")):
+                            boundary = i
+                    if boundary is None and len(audio) > SPECULATIVE_MAX_WINDOW * recorder.samplerate and len(segments) > 1:
+                        # No sentence end for a long time: commit all but the last segment anyway
+                        boundary = len(segments) - 2
+                    if boundary is None:
+                        continue
+                    text = " ".join(seg["text"].strip() for seg in segments[:boundary + 1])
+                    incremental.feed(text, complete=True)
+                    progress["committed"] += int(segments[boundary]["end"] * recorder.samplerate)
         
         def on_hotkey():
-            nonlocal is_recording, last_hotkey_time
+            nonlocal is_recording, last_hotkey_time, speculative_stop, speculative_progress
             
             # Debounce: ignore events faster than 0.5s
             current_time = time.time()
@@ -101,18 +170,30 @@ def main():
                 is_recording = True
                 recorder.start_recording()
                 notify_user(APP_NAME, "Recording started...")
+                if incremental:
+                    incremental.reset()
+                    speculative_stop = threading.Event()
+                    speculative_progress = {"committed": 0}
+                    threading.Thread(target=speculative_loop, args=(speculative_stop, speculative_progress),
+                                     daemon=True).start()
             else:
                 logging.info("Stop recording...")
                 is_recording = False
+                speculative_stop.set()
                 audio_path = recorder.stop_recording()
                 notify_user(APP_NAME, "Transcribing...")
                 
                 try:
                     # 1. Transcribe
                     logging.info("Transcribing...")
-                    raw_text = transcriber.transcribe(audio_path)
+                    with transcribe_lock:
+                        # Holding the lock, the speculative pass has stopped committing: the
+                        # committed sentences are kept and only the audio after them is decoded
+                        committed = speculative_progress["committed"] if incremental else 0
+                        tail_text = transcriber.transcribe(audio_path, start=committed) or ""
+                    raw_text = " ".join(t for t in (incremental.committed_text() if incremental else "", tail_text) if t)
                     if not raw_text:
-                        notify_user(APP_NAME, "No speech detected.")
+                        notify_user(APP_NAME, "No speech detected.", kind="result")
                         logging.info("No speech detected.")
                         return
 
@@ -124,7 +205,11 @@ def main():
                     if refiner:
                         notify_user(APP_NAME, "Refining text...")
                         logging.info("Refining text...")
-                        refined = refiner.refine(raw_text)
+                        if incremental:
+                            # Only the audio after the committed sentences goes to Ollama now
+                            refined = incremental.finish(tail_text)
+                        else:
+                            refined = refiner.refine(raw_text)
                         if refined:
                             final_text = refined
                             logging.info(f"Refined text: {final_text}")
@@ -134,15 +219,15 @@ def main():
                     # 3. Copy
                     if final_text:
                         copy_to_clipboard(final_text)
-                        notify_user(APP_NAME, "Copied to clipboard!")
+                        notify_user(APP_NAME, "Copied to clipboard!", kind="result")
                         logging.info("Copied to clipboard.")
                     else:
-                        notify_user(APP_NAME, "Result empty.")
+                        notify_user(APP_NAME, "Result empty.", kind="result")
                         logging.info("Result empty.")
 
                 except Exception as e:
                     logging.error(f"Error during processing: {e}")
-                    notify_user(APP_NAME, f"Error: {e}")
+                    notify_user(APP_NAME, f"Error: {e}", kind="error")
 
         # Set up global hotkey
         hotkey = config.get("hotkey", "ctrl+alt+r")
@@ -157,12 +242,22 @@ def main():
         # System Tray Icon Setup
         def on_exit(icon, item):
             logging.info("Exiting application via tray...")
+            get_dispatcher().close()
             icon.stop()
             sys.exit(0)
 
         icon = Icon("HelpMyToAnswer", create_image(), "HelpMyToAnswer", menu=(
             item('Exit', on_exit),
         ))
+
+        # Tray tooltip follows the same pipeline events as the toasts
+        def on_pipeline_event(event):
+            try:
+                icon.title = f"{APP_NAME}: {event.message}"
+            except Exception as e:
+                logging.debug(f"Tray title update failed: {e}")
+
+        get_dispatcher().subscribe(on_pipeline_event)
         
         logging.info("Starting System Tray Icon loop...")
         icon.run() # This blocks until icon.stop() is called
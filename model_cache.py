@@ -0,0 +1,102 @@
+"""
+Local cache of pre-converted Whisper checkpoints.
+
+Each model is converted once into a plain state-dict file in the target
+precision, which is then loaded with torch.load(mmap=True) straight into a
+meta-initialised model. Weights are paged in lazily from the page cache, so
+a second process (or a second instance) shares the same physical pages
+instead of unpickling its own copy.
+"""
+import os
+import logging
+import numpy as np
+import torch
+import whisper
+from whisper.model import ModelDimensions, Whisper, AudioEncoder, TextDecoder
+
+
+DEFAULT_CACHE_DIR = os.path.join(
+    os.getenv("XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache")),
+    "helpmytoanswer", "whisper"
+)
+
+
+# Bump when the converted layout changes, so stale cache files are not reused
+CACHE_FORMAT = 2
+
+# Whisper's LayerNorm runs in fp32 (it calls forward(x.float())), so its parameters must stay fp32
+FP32_MODULES = ("ln", "attn_ln", "cross_attn_ln", "mlp_ln", "ln_post")
+
+
+def _keep_fp32(key):
+    return key.rsplit(".", 1)[0].split(".")[-1] in FP32_MODULES
+
+
+def cache_path(model_size, dtype, cache_dir=None):
+    name = os.path.splitext(os.path.basename(model_size))[0]
+    dtype_name = str(dtype).replace("torch.", "")
+    return os.path.join(cache_dir or DEFAULT_CACHE_DIR, f"{name}-{dtype_name}-v{CACHE_FORMAT}.pt")
+
+
+def _original_checkpoint(model_size):
+    """Path of the stock Whisper checkpoint, downloading it if needed."""
+    if os.path.isfile(model_size):
+        return model_size
+    if model_size not in whisper._MODELS:
+        raise RuntimeError(f"Model {model_size} not found; available models = {whisper.available_models()}")
+    download_root = os.path.join(os.getenv("XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache")), "whisper")
+    return whisper._download(whisper._MODELS[model_size], download_root, False)
+
+
+def convert_checkpoint(model_size, dtype=torch.float32, cache_dir=None):
+    """Converts a Whisper checkpoint once into the mmap-able cache layout."""
+    path = cache_path(model_size, dtype, cache_dir)
+    if os.path.exists(path):
+        return path
+
+    logging.info(f"Converting Whisper '{model_size}' checkpoint to {path}...")
+    checkpoint = torch.load(_original_checkpoint(model_size), map_location="cpu")
+    state_dict = {
+        key: (value.to(dtype) if value.is_floating_point() and not _keep_fp32(key) else value).contiguous()
+        for key, value in checkpoint["model_state_dict"].items()
+    }
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Write then rename, so a concurrent process never sees a partial file
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    torch.save({"dims": checkpoint["dims"], "model_state_dict": state_dict}, tmp_path)
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_cached_model(model_size, device="cpu", dtype=torch.float32, cache_dir=None):
+    """Loads a Whisper model from the cache (converting it first if missing)."""
+    path = convert_checkpoint(model_size, dtype, cache_dir)
+    checkpoint = torch.load(path, map_location="cpu", mmap=True, weights_only=True)
+    dims = ModelDimensions(**checkpoint["dims"])
+
+    # Build encoder/decoder on the meta device so no weights are allocated, then adopt the
+    # mmapped tensors. Mirrors Whisper.__init__, whose sparse alignment_heads cannot be meta.
+    model = Whisper.__new__(Whisper)
+    torch.nn.Module.__init__(model)
+    model.dims = dims
+    with torch.device("meta"):
+        model.encoder = AudioEncoder(dims.n_mels, dims.n_audio_ctx, dims.n_audio_state,
+                                     dims.n_audio_head, dims.n_audio_layer)
+        model.decoder = TextDecoder(dims.n_vocab, dims.n_text_ctx, dims.n_text_state,
+                                    dims.n_text_head, dims.n_text_layer)
+    model.load_state_dict(checkpoint["model_state_dict"], assign=True)
+
+    # Non-persistent buffers are not in the state dict; rebuild them as Whisper.__init__ does
+    mask = torch.empty(dims.n_text_ctx, dims.n_text_ctx).fill_(-np.inf).triu_(1)
+    model.decoder.register_buffer("mask", mask, persistent=False)
+    alignment_heads = getattr(whisper, "_ALIGNMENT_HEADS", {}).get(model_size)
+    if alignment_heads:
+        model.set_alignment_heads(alignment_heads)
+    else:
+        all_heads = torch.zeros(dims.n_text_layer, dims.n_text_head, dtype=torch.bool)
+        all_heads[dims.n_text_layer // 2:] = True
+        model.register_buffer("alignment_heads", all_heads.to_sparse(), persistent=False)
+
+    # A no-op on CPU, so the weights stay backed by the shared file mapping
+    return model.to(device)
@@ -0,0 +1,141 @@
+import json
+import os
+import threading
+import logging
+import numpy as np
+
+# Starting cost model before anything is measured: seconds = overhead + rtf * speech seconds.
+# The overhead covers the fixed 30 s mel window Whisper always encodes, however short the clip.
+DEFAULT_COST = {
+    "tiny": (0.3, 0.03),
+    "base": (0.5, 0.06),
+    "small": (1.5, 0.15),
+    "medium": (4.0, 0.4),
+    "large": (8.0, 0.8),
+}
+GPU_SPEEDUP = 10.0
+
+# Whisper's own fallback thresholds for a failed decode
+LOGPROB_THRESHOLD = -1.0
+COMPRESSION_RATIO_THRESHOLD = 2.4
+
+
+def speech_duration(data, samplerate=16000, frame_ms=30):
+    """Seconds of speech in a mono float32 clip, from a simple frame-energy VAD."""
+    frame = int(samplerate * frame_ms / 1000)
+    n_frames = len(data) // frame
+    if n_frames == 0:
+        return 0.0
+    frames = data[:n_frames * frame].reshape(n_frames, frame)
+    rms = np.sqrt(np.mean(frames ** 2, axis=1))
+    # Relative to the noise floor, capped so a clip with no pauses still counts as speech
+    threshold = max(0.005, min(2.5 * float(np.percentile(rms, 10)), 0.02))
+    return int(np.count_nonzero(rms > threshold)) * frame_ms / 1000
+
+
+def is_low_confidence(result, logprob_threshold=LOGPROB_THRESHOLD,
+                      compression_ratio_threshold=COMPRESSION_RATIO_THRESHOLD):
+    """True if Whisper's segment statistics suggest the decode should be retried on a larger model."""
+    segments = result.get("segments") or []
+    if not segments:
+        return False
+    weights = [max(seg.get("end", 0) - seg.get("start", 0), 0.01) for seg in segments]
+    avg_logprob = sum(w * seg.get("avg_logprob", 0.0) for w, seg in zip(weights, segments)) / sum(weights)
+    compression_ratio = max(seg.get("compression_ratio", 0.0) for seg in segments)
+    return avg_logprob < logprob_threshold or compression_ratio > compression_ratio_threshold
+
+
+class RealTimeFactorTable:
+    """
+    Per-model latency model measured on this machine: a fixed per-call
+    overhead plus a real-time factor per second of speech. Fitted online by
+    least squares over exponentially weighted running sums, and persisted
+    between runs.
+    """
+    def __init__(self, filepath=None, device="cpu", alpha=0.1):
+        self.filepath = filepath
+        self.device = device
+        self.alpha = alpha
+        self._lock = threading.Lock()
+        self._table = {}
+        self._load()
+
+    def _key(self, model_size):
+        return f"{model_size}@{self.device}"
+
+    def _load(self):
+        if not self.filepath or not os.path.exists(self.filepath):
+            return
+        try:
+            with open(self.filepath, 'r', encoding='utf-8') as f:
+                table = json.load(f)
+            # Entries from older formats (a bare RTF number) are dropped
+            self._table = {k: v for k, v in table.items() if isinstance(v, dict)}
+        except Exception as e:
+            logging.error(f"Failed to load RTF table: {e}")
+
+    def _save(self):
+        if not self.filepath:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.filepath), exist_ok=True)
+            with open(self.filepath, 'w', encoding='utf-8') as f:
+                json.dump(self._table, f, indent=2)
+        except Exception as e:
+            logging.error(f"Failed to save RTF table: {e}")
+
+    def prior(self, model_size):
+        overhead, rtf = DEFAULT_COST.get(model_size.split(".")[0].split("-")[0], DEFAULT_COST["medium"])
+        if self.device == "cuda":
+            return overhead / GPU_SPEEDUP, rtf / GPU_SPEEDUP
+        return overhead, rtf
+
+    def get(self, model_size):
+        """Returns (overhead, rtf) for the model."""
+        prior_overhead, prior_rtf = self.prior(model_size)
+        with self._lock:
+            stats = self._table.get(self._key(model_size))
+        if not stats:
+            return prior_overhead, prior_rtf
+        mx, my = stats["mx"], stats["my"]
+        var = stats["mxx"] - mx * mx
+        # Only fit the slope once clip lengths vary enough; otherwise keep the prior slope
+        if stats["n"] >= 5 and var > 1.0:
+            rtf = max(0.0, (stats["mxy"] - mx * my) / var)
+        else:
+            rtf = prior_rtf
+        return max(0.0, my - rtf * mx), rtf
+
+    def update(self, model_size, elapsed, seconds):
+        with self._lock:
+            key = self._key(model_size)
+            stats = self._table.get(key)
+            if stats is None:
+                stats = {"n": 0, "mx": seconds, "my": elapsed, "mxx": seconds * seconds, "mxy": seconds * elapsed}
+            else:
+                a = self.alpha
+                stats["mx"] = (1 - a) * stats["mx"] + a * seconds
+                stats["my"] = (1 - a) * stats["my"] + a * elapsed
+                stats["mxx"] = (1 - a) * stats["mxx"] + a * seconds * seconds
+                stats["mxy"] = (1 - a) * stats["mxy"] + a * seconds * elapsed
+            stats["n"] += 1
+            self._table[key] = stats
+            self._save()
+
+    def estimate(self, model_size, seconds):
+        overhead, rtf = self.get(model_size)
+        return overhead + rtf * seconds
+
+
+def select_model(cascade, seconds, budget, rtf_table, budget_rtf=0.0):
+    """
+    Largest model in the cascade (ordered small to large) expected to finish
+    within budget + budget_rtf * seconds, so longer clips may use larger
+    models. Falls back to the smallest model when none fits.
+    """
+    allowed = budget + budget_rtf * seconds
+    chosen = cascade[0]
+    for model_size in cascade:
+        if rtf_table.estimate(model_size, seconds) <= allowed:
+            chosen = model_size
+    return chosen
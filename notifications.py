@@ -0,0 +1,128 @@
+import threading
+import time
+import logging
+from collections import deque, namedtuple
+
+# kind: "status" (superseded by the next status), "result" or "error" (always delivered)
+PipelineEvent = namedtuple("PipelineEvent", ["kind", "title", "message", "toast", "timestamp"])
+
+COALESCED_KINDS = ("status",)
+
+
+def _plyer_toast(title, message, app_name, timeout):
+    from plyer import notification
+    notification.notify(
+        title=title,
+        message=message,
+        app_name=app_name,
+        timeout=timeout
+    )
+
+
+class NotificationDispatcher:
+    """
+    Single long-lived thread that fans pipeline events out to subscribers
+    and shows OS toasts. Pending status events are coalesced so only the
+    latest one is shown, and toasts are rate-limited to one per min_interval.
+    """
+    def __init__(self, app_name="HelpMyToAnswer", max_pending=16, min_interval=1.0,
+                 toast_timeout=3, toast_backend=None):
+        self.app_name = app_name
+        self.max_pending = max_pending
+        self.min_interval = min_interval
+        self.toast_timeout = toast_timeout
+        self.toast_backend = toast_backend or _plyer_toast
+
+        self._pending = deque()
+        self._subscribers = []
+        self._cond = threading.Condition()
+        self._running = True
+        self._last_toast = 0.0
+        self._thread = threading.Thread(target=self._run, name="NotificationDispatcher", daemon=True)
+        self._thread.start()
+
+    def subscribe(self, callback):
+        """Registers callback(event) to be called from the dispatcher thread for every event."""
+        with self._cond:
+            if callback not in self._subscribers:
+                self._subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        with self._cond:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+
+    def publish(self, message, title=None, kind="status", toast=True):
+        event = PipelineEvent(kind, title or self.app_name, message, toast, time.time())
+        with self._cond:
+            if not self._running:
+                return
+            if kind in COALESCED_KINDS:
+                # A newer status supersedes any status still waiting to be shown
+                self._pending = deque(e for e in self._pending if e.kind not in COALESCED_KINDS)
+            if len(self._pending) >= self.max_pending:
+                # Bounded queue: drop the oldest pending event
+                dropped = self._pending.popleft()
+                logging.debug(f"Notification queue full, dropped: {dropped.message}")
+            self._pending.append(event)
+            self._cond.notify()
+
+    def close(self, timeout=2.0):
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        if self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+
+    def _is_superseded(self, event):
+        # Caller holds the lock
+        return event.kind in COALESCED_KINDS and any(e.kind in COALESCED_KINDS for e in self._pending)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._running and not self._pending:
+                    self._cond.wait()
+                if not self._pending:
+                    return
+                event = self._pending.popleft()
+                subscribers = list(self._subscribers)
+
+            for callback in subscribers:
+                try:
+                    callback(event)
+                except Exception as e:
+                    logging.error(f"Notification subscriber error: {e}")
+
+            if event.toast:
+                self._toast(event)
+
+    def _toast(self, event):
+        # Rate limit: wait out the remaining interval, giving newer events a chance to supersede this one
+        with self._cond:
+            deadline = self._last_toast + self.min_interval
+            while self._running and time.time() < deadline:
+                if self._is_superseded(event):
+                    return
+                self._cond.wait(deadline - time.time())
+            if self._is_superseded(event):
+                return
+            self._last_toast = time.time()
+
+        try:
+            self.toast_backend(event.title, event.message, self.app_name, self.toast_timeout)
+        except Exception as e:
+            logging.error(f"Notification error: {e}")
+
+
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+
+def get_dispatcher():
+    """Returns the process-wide dispatcher, starting it on first use."""
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            _dispatcher = NotificationDispatcher()
+        return _dispatcher
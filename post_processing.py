@@ -1,32 +1,230 @@
 import ollama
+import re
+import threading
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from text_cleanup import clean_text, count_disfluencies, is_clean, SENTENCE_PUNCT_RE
+
+SENTENCE_END = re.compile(r'(?<=[.!?…])\s+')
+
+def split_sentences(text):
+    """
+    Splits text into (complete_sentences, tail). The last segment is always
+    treated as the unfinished tail, since speech may still continue after it.
+    """
+    parts = [p for p in SENTENCE_END.split(" ".join(text.split())) if p] if text else []
+    if not parts:
+        return [], ""
+    return parts[:-1], parts[-1]
+
+SYSTEM_PROMPT = (
+    "You fix the grammar, punctuation, and formatting of dictated text. "
+    "Remove any filler words (like 'um', 'uh'). "
+    "Return ONLY the corrected text, do not add any conversational filler or introductions."
+)
+
+# Context sizes are bucketed: Ollama reloads the model whenever num_ctx changes
+NUM_CTX_BUCKETS = (2048, 4096, 8192, 16384)
 
 class TextRefiner:
-    def __init__(self, model="llama3"):
+    def __init__(self, model="llama3", use_system_prompt=True, keep_alive="30m", keep_warm_interval=240):
         self.model = model
+        # Fixed system prompt first, so the server can reuse its KV cache for the prefix
+        self.use_system_prompt = use_system_prompt
+        self.keep_alive = keep_alive
+        self.keep_warm_interval = keep_warm_interval
+        self.num_ctx = NUM_CTX_BUCKETS[0]
+        self.last_used = 0.0
+        self._stop_keep_warm = threading.Event()
+        self._keep_warm_thread = None
+        if self.keep_warm_interval:
+            self._keep_warm_thread = threading.Thread(target=self._keep_warm_loop, name="OllamaKeepWarm", daemon=True)
+            self._keep_warm_thread.start()
         print(f"TextRefiner initialized with model: {self.model}")
 
-    def refine(self, text):
-        """
-        Sends text to Ollama for grammar and formatting correction.
-        """
-        if not text:
-            return None
+    def _num_ctx_for(self, text):
+        # ~3 chars per token for the input, the same again for the output, plus the prompt
+        needed = (len(SYSTEM_PROMPT) + 2 * len(text)) // 3 + 256
+        for size in NUM_CTX_BUCKETS:
+            if needed <= size:
+                return size
+        return NUM_CTX_BUCKETS[-1]
 
+    def _messages(self, text):
+        if self.use_system_prompt:
+            return [
+                {'role': 'system', 'content': SYSTEM_PROMPT},
+                {'role': 'user', 'content': text},
+            ]
         prompt = (
             f"Please fix the grammar, punctuation, and formatting of the following text. "
             f"Remove any filler words (like 'um', 'uh'). "
             f"Return ONLY the corrected text, do not add any conversational filler or introductions.\n\n"
             f"Text: {text}"
         )
+        return [{'role': 'user', 'content': prompt}]
+
+    def refine(self, text):
+        """
+        Sends text to Ollama for grammar and formatting correction.
+        """
+        if not text:
+            return None
 
+        # Never shrink the context: a smaller num_ctx would also force a reload
+        self.num_ctx = max(self.num_ctx, self._num_ctx_for(text))
         try:
-            response = ollama.chat(model=self.model, messages=[
-                {
-                    'role': 'user',
-                    'content': prompt,
-                },
-            ])
+            response = ollama.chat(
+                model=self.model,
+                messages=self._messages(text),
+                keep_alive=self.keep_alive,
+                options={'num_ctx': self.num_ctx}
+            )
             return response['message']['content'].strip()
         except Exception as e:
             print(f"Ollama error: {e}")
             return text # Fallback to original text if Ollama fails
+        finally:
+            self.last_used = time.time()
+
+    def warm_up(self):
+        """Loads the model (with the current num_ctx) without generating anything."""
+        try:
+            ollama.generate(model=self.model, prompt="", keep_alive=self.keep_alive,
+                            options={'num_ctx': self.num_ctx})
+            logging.debug("Ollama keep-warm ping sent")
+        except Exception as e:
+            logging.warning(f"Ollama keep-warm ping failed: {e}")
+
+    def _keep_warm_loop(self):
+        # Load at startup, then ping whenever the app has been idle for a full interval
+        self.warm_up()
+        self.last_used = time.time()
+        while not self._stop_keep_warm.wait(self.keep_warm_interval):
+            if time.time() - self.last_used >= self.keep_warm_interval:
+                self.warm_up()
+                self.last_used = time.time()
+
+    def close(self):
+        self._stop_keep_warm.set()
+
+
+class RefinementRouter:
+    """
+    Sends short or already-clean text through the local rule-based cleanup and
+    only escalates to the LLM refiner past the length/complexity thresholds.
+    Has the same refine() interface as TextRefiner.
+    """
+    def __init__(self, refiner, short_words=8, max_words=40, max_disfluencies=2, language=None):
+        self.refiner = refiner
+        self.short_words = short_words
+        self.max_words = max_words
+        self.max_disfluencies = max_disfluencies
+        self.language = language
+
+    def needs_llm(self, text, language=None):
+        words = len(text.split())
+        if words <= self.short_words:
+            return False
+        if words > self.max_words:
+            return True
+        # Mid-length text: keep already-clean text local, escalate if unpunctuated or heavily disfluent
+        if is_clean(text, language):
+            return False
+        if not SENTENCE_PUNCT_RE.search(text):
+            return True
+        return count_disfluencies(text, language) > self.max_disfluencies
+
+    def refine(self, text, language=None):
+        if not text:
+            return None
+        language = language or self.language
+        if self.refiner and self.needs_llm(text, language):
+            logging.info("Refinement routed to LLM")
+            return self.refiner.refine(text)
+        logging.info("Refinement routed to local cleanup")
+        return clean_text(text, language)
+
+
+class IncrementalRefiner:
+    """
+    Speculatively refines completed sentences in the background while the user
+    is still speaking, so that at stop only the unfinished tail needs a call.
+    Sentences are kept in the order they were committed; at stop the caller
+    transcribes only the audio after the committed part and passes that tail.
+    """
+    def __init__(self, refiner):
+        self.refiner = refiner
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="IncrementalRefiner")
+        self._committed = [] # (raw sentence, Future of refined sentence), in spoken order
+        self._lock = threading.Lock()
+
+    def reset(self):
+        with self._lock:
+            for _, future in self._committed:
+                future.cancel()
+            self._committed = []
+
+    def feed(self, text, complete=False):
+        """
+        Commits the completed sentences of a newly transcribed stretch of audio
+        and queues them for refinement. With complete=True the last sentence is
+        treated as finished too; otherwise it is dropped.
+        """
+        sentences, tail = split_sentences(text)
+        if complete and tail:
+            sentences.append(tail)
+        with self._lock:
+            for sentence in sentences:
+                self._committed.append((sentence, self._executor.submit(self.refiner.refine, sentence)))
+
+    def committed_text(self):
+        """Raw text of everything committed so far."""
+        with self._lock:
+            return " ".join(sentence for sentence, _ in self._committed)
+
+    def _result(self, future, timeout):
+        if future.cancel():
+            # Never started: cheaper to fold it into the synchronous call
+            return None
+        try:
+            return future.result(timeout=timeout)
+        except Exception as e:
+            logging.warning(f"Speculative refinement unavailable: {e}")
+            return None
+
+    def finish(self, tail, timeout=30):
+        """
+        Returns the refined committed sentences followed by the refined tail
+        (the transcript of the audio after the committed part). Sentences whose
+        speculative refinement is missing are sent along with the tail, each
+        run of them in a single call.
+        """
+        with self._lock:
+            committed = list(self._committed)
+        if not committed and not tail:
+            return None
+
+        pieces = []
+        run = []
+        for sentence, future in committed:
+            refined = self._result(future, timeout)
+            if refined:
+                if run:
+                    pieces.append(self.refiner.refine(" ".join(run)) or " ".join(run))
+                    run = []
+                pieces.append(refined)
+            else:
+                run.append(sentence)
+        if tail:
+            run.append(tail)
+        if run:
+            pieces.append(self.refiner.refine(" ".join(run)) or " ".join(run))
+
+        self.reset()
+        return " ".join(pieces)
+
+    def close(self):
+        self.reset()
+        self._executor.shutdown(wait=False)
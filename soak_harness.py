@@ -0,0 +1,458 @@
+"""
+Headless soak/load harness.
+
+Replaces the hardware and model backends (sounddevice, whisper, ollama, plus
+keyboard/pystray/plyer/pyperclip/torch) with fakes, then drives the Qt
+TranscriptionWorker and main.py's on_hotkey through thousands of recordings.
+RSS, thread count, open handles and stop-to-result latency are sampled over
+time; the run fails if any of them keeps growing past the configured limits.
+
+    python soak_harness.py --target both --iterations 2000 --rate 20
+"""
+import argparse
+import gc
+import logging
+import os
+import statistics
+import sys
+import threading
+import time
+import types
+
+import numpy as np
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+# ---------------------------------------------------------------------------
+# Fake backends
+# ---------------------------------------------------------------------------
+
+class FakeSettings:
+    speedup = 20.0          # fake audio is produced this many times faster than real time
+    whisper_rtf = 0.01      # fake decode seconds per second of audio
+    whisper_load_s = 0.05   # fake model load time
+    model_mb = 8            # memory held by each fake model, so per-recording reloads show up in RSS
+    ollama_latency = 0.005  # fake seconds per chat call
+    whisper_calls = 0       # counters, to confirm the speculative path actually ran
+    chat_calls = 0
+
+
+settings = FakeSettings()
+
+
+class FakeInputStream:
+    def __init__(self, samplerate=16000, channels=1, device=None, callback=None, blocksize=1600, **kwargs):
+        self.samplerate = samplerate
+        self.channels = channels
+        self.callback = callback
+        self.blocksize = blocksize or 1600
+        self._block = (np.random.default_rng(0).standard_normal((self.blocksize, channels)) * 0.01).astype(np.float32)
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._pump, name="FakeInputStream", daemon=True)
+        self._thread.start()
+
+    def _pump(self):
+        interval = self.blocksize / self.samplerate / settings.speedup
+        while not self._stop.wait(interval):
+            if self.callback:
+                self.callback(self._block, self.blocksize, None, None)
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def close(self):
+        self.stop()
+
+
+class FakeWhisperModel:
+    WORDS = "the quick brown fox jumps over the lazy dog and then it rests".split()
+
+    def __init__(self, name):
+        self.name = name
+        self.weights = bytearray(settings.model_mb * 1024 * 1024)
+
+    WORDS_PER_SECOND = 2.5
+    WORDS_PER_SENTENCE = 3
+
+    def transcribe(self, audio, **options):
+        settings.whisper_calls += 1
+        duration = len(audio) / 16000.0
+        time.sleep(duration * settings.whisper_rtf)
+        n_words = max(1, int(duration * self.WORDS_PER_SECOND))
+        words = [self.WORDS[i % len(self.WORDS)] for i in range(n_words)]
+        # Short sentences, one segment each, so the speculative pass finds sentence boundaries
+        segments = []
+        for i in range(0, n_words, self.WORDS_PER_SENTENCE):
+            chunk = words[i:i + self.WORDS_PER_SENTENCE]
+            segments.append({
+                "start": i / self.WORDS_PER_SECOND,
+                "end": min((i + len(chunk)) / self.WORDS_PER_SECOND, duration),
+                "text": " " + " ".join(chunk).capitalize() + ".",
+                "avg_logprob": -0.2,
+                "compression_ratio": 1.2,
+            })
+        text = "".join(seg["text"] for seg in segments)
+        return {"text": text, "segments": segments, "language": options.get("language") or "en"}
+
+
+def _fake_load_model(name, device=None, **kwargs):
+    time.sleep(settings.whisper_load_s)
+    return FakeWhisperModel(name)
+
+
+def _fake_generate(model=None, prompt="", **kwargs):
+    return {"response": ""}
+
+
+def _fake_chat(model=None, messages=None, **kwargs):
+    settings.chat_calls += 1
+    time.sleep(settings.ollama_latency)
+    content = messages[-1]["content"] if messages else ""
+    if "Text:" in content:
+        content = content.split("Text:", 1)[1]
+    return {"message": {"content": content.strip()}}
+
+
+class FakeIcon:
+    instances = []
+
+    def __init__(self, name, image=None, title=None, menu=None):
+        self.name = name
+        self.title = title
+        self._stopped = threading.Event()
+        FakeIcon.instances.append(self)
+
+    def run(self):
+        self._stopped.wait()
+
+    def stop(self):
+        self._stopped.set()
+
+
+class FakeKeyboard:
+    hotkeys = {}
+
+    @classmethod
+    def add_hotkey(cls, hotkey, callback, *args, **kwargs):
+        cls.hotkeys[hotkey] = callback
+
+
+def _module(name, **attrs):
+    mod = types.ModuleType(name)
+    mod.__dict__.update(attrs)
+    return mod
+
+
+def install_fake_backends():
+    """Registers the fake modules; must run before any app module is imported."""
+    clipboard = {}
+    fakes = {
+        "sounddevice": _module(
+            "sounddevice",
+            InputStream=FakeInputStream,
+            query_devices=lambda: [{"name": "Fake Mic", "max_input_channels": 1}],
+        ),
+        "whisper": _module("whisper", load_model=_fake_load_model),
+        # No checkpoint cache for the fake models: Transcriber falls back to load_model
+        "whisper.model": _module("whisper.model", ModelDimensions=None, Whisper=None, AudioEncoder=None, TextDecoder=None),
+        "ollama": _module("ollama", chat=_fake_chat, generate=_fake_generate),
+        "torch": _module("torch", cuda=_module("torch.cuda", is_available=lambda: False),
+                         float16="float16", float32="float32"),
+        "keyboard": _module("keyboard", add_hotkey=FakeKeyboard.add_hotkey),
+        "pyperclip": _module("pyperclip", copy=lambda text: clipboard.__setitem__("text", text)),
+        "plyer": _module("plyer", notification=_module("plyer.notification", notify=lambda **kwargs: None)),
+        "pystray": _module("pystray", Icon=FakeIcon, MenuItem=lambda *args, **kwargs: None),
+    }
+    sys.modules.update(fakes)
+
+
+# ---------------------------------------------------------------------------
+# Metrics
+# ---------------------------------------------------------------------------
+
+def read_rss_mb():
+    if psutil:
+        return psutil.Process().memory_info().rss / (1024 * 1024)
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return float("nan")
+
+
+def count_threads():
+    if psutil:
+        return psutil.Process().num_threads()
+    try:
+        return len(os.listdir("/proc/self/task"))
+    except OSError:
+        return threading.active_count()
+
+
+def count_open_handles():
+    if psutil:
+        proc = psutil.Process()
+        return proc.num_handles() if hasattr(proc, "num_handles") else proc.num_fds()
+    try:
+        return len(os.listdir("/proc/self/fd"))
+    except OSError:
+        return -1
+
+
+class SoakMonitor:
+    def __init__(self, name, sample_every=50, warmup=100):
+        self.name = name
+        self.sample_every = sample_every
+        self.warmup = warmup
+        self.samples = [] # (iteration, rss_mb, threads, handles)
+        self.latencies = []
+        self.errors = 0
+        self.failures = [] # driver-specific failures, merged into check()
+
+    def record(self, iteration, latency=None):
+        if latency is not None:
+            self.latencies.append(latency)
+        if iteration >= self.warmup and (iteration - self.warmup) % self.sample_every == 0:
+            gc.collect()
+            self.samples.append((iteration, read_rss_mb(), count_threads(), count_open_handles()))
+
+    def check(self, args):
+        """Returns a list of failure messages (empty if the run looks healthy)."""
+        failures = list(self.failures)
+        if self.errors > args.max_errors:
+            failures.append(f"{self.errors} iterations failed")
+        if len(self.samples) < 2:
+            return failures + ["not enough samples, increase --iterations"]
+
+        first, last = self.samples[0], self.samples[-1]
+        rss_growth = last[1] - first[1]
+        if rss_growth > args.max_rss_growth_mb:
+            failures.append(f"RSS grew {rss_growth:.1f} MB (limit {args.max_rss_growth_mb})")
+        if last[2] - first[2] > args.max_thread_growth:
+            failures.append(f"threads grew {first[2]} -> {last[2]}")
+        if first[3] >= 0 and last[3] - first[3] > args.max_handle_growth:
+            failures.append(f"open handles grew {first[3]} -> {last[3]}")
+
+        # Unbounded growth: RSS still climbing across the second half of the run
+        half = self.samples[len(self.samples) // 2:]
+        if len(half) >= 2:
+            xs = [s[0] for s in half]
+            ys = [s[1] for s in half]
+            slope = np.polyfit(xs, ys, 1)[0] * 1000
+            if slope > args.max_rss_slope_mb:
+                failures.append(f"RSS still growing {slope:.2f} MB per 1000 iterations (limit {args.max_rss_slope_mb})")
+
+        window = max(5, len(self.latencies) // 10)
+        settled = self.latencies[self.warmup:]
+        if len(settled) >= 2 * window:
+            head = statistics.median(settled[:window])
+            tail = statistics.median(settled[-window:])
+            if head > 0 and tail / head > args.max_latency_drift:
+                failures.append(f"latency drifted {head * 1000:.1f} ms -> {tail * 1000:.1f} ms")
+        return failures
+
+    def report(self):
+        print(f"\n[{self.name}] {len(self.latencies)} iterations, {self.errors} errors")
+        if self.latencies:
+            lat = sorted(self.latencies)
+            print(f"  latency p50={lat[len(lat) // 2] * 1000:.1f} ms  p95={lat[int(len(lat) * 0.95)] * 1000:.1f} ms")
+        for iteration, rss, threads, handles in self.samples[::max(1, len(self.samples) // 10)]:
+            print(f"  iter {iteration:6d}  rss={rss:8.1f} MB  threads={threads:4d}  handles={handles:5d}")
+
+
+# ---------------------------------------------------------------------------
+# Drivers
+# ---------------------------------------------------------------------------
+
+def _pace(started, args):
+    # Hold the recording for the (sped-up) clip length, and cap to --rate recordings per second
+    hold = args.clip_seconds / settings.speedup
+    time.sleep(hold)
+    return max(0.0, 1.0 / args.rate - (time.time() - started))
+
+
+def soak_worker(args):
+    """Drives one persistent gui_main.TranscriptionWorker the way MainWindow does."""
+    from PyQt6.QtCore import QCoreApplication, Qt
+    app = QCoreApplication.instance() or QCoreApplication(sys.argv[:1])
+    import gui_main
+
+    results = []
+    done = threading.Event()
+    worker = gui_main.TranscriptionWorker(model_size="base", device="cpu")
+    # Direct connections: the harness thread has no running event loop
+    finished = []
+    worker.partial_result.connect(lambda rid, text, stability: results.append((rid, text)), Qt.ConnectionType.DirectConnection)
+    worker.recording_finished.connect(lambda rid: (finished.append(rid), done.set()), Qt.ConnectionType.DirectConnection)
+    worker.start()
+
+    monitor = SoakMonitor("TranscriptionWorker", args.sample_every, args.warmup)
+    for i in range(args.iterations):
+        started = time.time()
+        results.clear()
+        finished.clear()
+        done.clear()
+        # Every tenth recording also sends duplicate presses, which must be ignored
+        presses = 2 if i % 10 == 0 else 1
+        try:
+            for _ in range(presses):
+                worker.start_recording(model_size="base", recording_id=i)
+            idle = _pace(started, args)
+
+            stop_time = time.time()
+            for _ in range(presses):
+                worker.stop_recording()
+            if not done.wait(args.timeout):
+                raise TimeoutError("worker did not finish the recording")
+            latency = time.time() - stop_time
+            if not results:
+                raise RuntimeError("no transcript emitted")
+            if finished != [i] or any(rid != i for rid, _ in results):
+                raise RuntimeError(f"signals tagged with the wrong recording: {finished}")
+        except Exception as e:
+            logging.error(f"Worker iteration {i} failed: {e}")
+            monitor.errors += 1
+            latency = None
+            idle = 0.0
+        monitor.record(i, latency)
+        time.sleep(idle)
+
+    worker.shutdown()
+    app.processEvents()
+    return monitor
+
+
+def soak_hotkey(args):
+    """Runs main.main() with fake tray/hotkey backends and presses the hotkey repeatedly."""
+    import main as tray_main
+    import config_handler
+
+    class SkewedClock:
+        # Every call looks a second later, so on_hotkey's 0.5 s debounce never drops a press
+        def __init__(self):
+            self.offset = 0.0
+
+        def time(self):
+            self.offset += 1.0
+            return time.time() + self.offset
+
+    tray_main.is_already_running = lambda: False
+    # Default config, without writing config.json into the working directory
+    config = dict(config_handler.DEFAULT_CONFIG)
+    # Scale the speculative interval with the fake audio speed-up, so every recording
+    # runs speculative_loop, AudioRecorder.snapshot and IncrementalRefiner.feed a few times
+    hold = args.clip_seconds / settings.speedup
+    config["incremental_refine_interval"] = hold / 4
+    # Route everything to the (fake) LLM so speculative sentences reach Ollama too
+    config["fast_cleanup"] = False
+    tray_main.load_config = lambda: config
+    tray_main.time = SkewedClock()
+    FakeKeyboard.hotkeys.clear()
+    FakeIcon.instances.clear()
+
+    app_thread = threading.Thread(target=tray_main.main, name="SoakMain", daemon=True)
+    app_thread.start()
+    deadline = time.time() + args.timeout
+    while not FakeIcon.instances and time.time() < deadline:
+        time.sleep(0.01)
+    if not FakeKeyboard.hotkeys:
+        raise RuntimeError("main() did not register a hotkey")
+    on_hotkey = next(iter(FakeKeyboard.hotkeys.values()))
+
+    monitor = SoakMonitor("on_hotkey", args.sample_every, args.warmup)
+    whisper_calls, chat_calls = settings.whisper_calls, settings.chat_calls
+    for i in range(args.iterations):
+        started = time.time()
+        try:
+            on_hotkey()
+            idle = _pace(started, args)
+            stop_time = time.time()
+            on_hotkey() # Stop: transcribe, refine and copy run synchronously here
+            latency = time.time() - stop_time
+        except Exception as e:
+            logging.error(f"Hotkey iteration {i} failed: {e}")
+            monitor.errors += 1
+            latency = None
+            idle = 0.0
+        monitor.record(i, latency)
+        time.sleep(idle)
+
+    # One final decode per recording; anything beyond that came from speculative_loop
+    speculative = settings.whisper_calls - whisper_calls - args.iterations
+    print(f"\n[on_hotkey] {speculative} speculative decodes, {settings.chat_calls - chat_calls} Ollama calls")
+    if speculative <= 0:
+        monitor.failures.append("speculative refinement path never ran")
+
+    for icon in FakeIcon.instances:
+        icon.stop()
+    app_thread.join(args.timeout)
+    return monitor
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Headless soak test with fake audio, Whisper and Ollama backends.")
+    parser.add_argument("--target", choices=["worker", "hotkey", "both"], default="both")
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--rate", type=float, default=20.0, help="max recordings per second")
+    parser.add_argument("--clip-seconds", type=float, default=4.0, help="simulated speech per recording")
+    parser.add_argument("--speedup", type=float, default=settings.speedup)
+    parser.add_argument("--whisper-rtf", type=float, default=settings.whisper_rtf)
+    parser.add_argument("--ollama-latency", type=float, default=settings.ollama_latency)
+    parser.add_argument("--model-mb", type=int, default=settings.model_mb)
+    parser.add_argument("--warmup", type=int, default=100)
+    parser.add_argument("--sample-every", type=int, default=50)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--max-errors", type=int, default=0)
+    parser.add_argument("--max-rss-growth-mb", type=float, default=50.0)
+    parser.add_argument("--max-rss-slope-mb", type=float, default=5.0, help="MB per 1000 iterations")
+    parser.add_argument("--max-thread-growth", type=int, default=2)
+    parser.add_argument("--max-handle-growth", type=int, default=5)
+    parser.add_argument("--max-latency-drift", type=float, default=2.0, help="tail/head median latency ratio")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    settings.speedup = args.speedup
+    settings.whisper_rtf = args.whisper_rtf
+    settings.ollama_latency = args.ollama_latency
+    settings.model_mb = args.model_mb
+
+    # Configure logging before the app modules call basicConfig with their own log files
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    install_fake_backends()
+
+    monitors = []
+    if args.target in ("worker", "both"):
+        monitors.append(soak_worker(args))
+    if args.target in ("hotkey", "both"):
+        monitors.append(soak_hotkey(args))
+
+    failed = False
+    for monitor in monitors:
+        monitor.report()
+        failures = monitor.check(args)
+        for failure in failures:
+            print(f"  FAIL: {failure}")
+        failed = failed or bool(failures)
+    print("\nSOAK FAILED" if failed else "\nSOAK PASSED")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
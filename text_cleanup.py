@@ -0,0 +1,103 @@
+import re
+
+# Filler words per language code (same codes as the GUI language selector).
+# Kept conservative: only tokens that are almost never meaningful on their own.
+# "mm"/"мм" after a number is a unit, and a bare "er" is only a filler before a comma ("to err").
+FILLERS = {
+    "en": ["u+m+", "u+h+", "u+h+m+", "e+r+m+", "e+r+(?=,)", "a+h+", "h+m+", "m+h+m+", r"(?<!\d\s)m{2,}"],
+    "uk": ["е+", "е+м+", "е+ее", r"(?<!\d\s)м{2,}", "х+м+", "ну-у+"],
+    "ru": ["э+", "э+м+", r"(?<!\d\s)м{2,}", "х+м+", "ну-у+"],
+}
+
+
+def _compile_fillers(patterns):
+    # Filler plus an optional trailing comma, as a whole word (not part of a hyphenated one).
+    # Case-insensitive except for all-caps words, which are acronyms (UM, ER), not fillers.
+    return re.compile(
+        r"(?<![\w-])(?!(?-i:[A-ZА-ЯЁІЇЄҐ]{2,})(?![\w-]))(?:" + "|".join(patterns) + r")(?![\w-])\s*,?",
+        re.IGNORECASE
+    )
+
+
+FILLER_RE = {lang: _compile_fillers(patterns) for lang, patterns in FILLERS.items()}
+FILLER_RE[None] = _compile_fillers([p for patterns in FILLERS.values() for p in patterns])
+
+REPEATED_WORD_RE = re.compile(r"(?<!\w)(\w+)(?:[\s,]+\1)+(?!\w)", re.IGNORECASE)
+SPACE_BEFORE_PUNCT_RE = re.compile(r"\s+([,.!?;:…])")
+# No space is added after "." so tokens like example.com, Node.js and U.S. are left alone
+SPACE_AFTER_PUNCT_RE = re.compile(r"([,!?;:…])(?=[^\W\d_])")
+REPEATED_COMMA_RE = re.compile(r",(?:\s*,)+")
+# Punctuation left stranded by a removed filler, e.g. "ok. um. fine" -> "ok. . fine"
+STRANDED_PUNCT_RE = re.compile(r"([,.!?;:…])(?:\s+[,.!?;:…])+")
+WHITESPACE_RE = re.compile(r"\s+")
+# Words whose trailing "." does not end a sentence
+ABBREVIATIONS = {"mr", "mrs", "ms", "dr", "prof", "st", "vs", "jr", "sr"}
+# "i" as a word, but not the "i" of "i.e."
+STANDALONE_I_RE = re.compile(r"(?<!\w)i(?=$|[\s,!?;:']|’|\.(?!\w))")
+SENTENCE_PUNCT_RE = re.compile(r"[.!?…]")
+
+
+def _stranded_punct(m):
+    # Keep the strongest mark of the run: a sentence end wins over a comma
+    run = m.group(0)
+    return next((c for c in run if c in ".!?…"), m.group(1))
+
+
+def _ends_sentence(token):
+    if not token or token[-1] not in ".!?…":
+        return False
+    if token[-1] == ".":
+        word = token[:-1]
+        # Abbreviations (e.g., U.S., Dr.) and single initials do not end a sentence
+        if "." in word or len(word) == 1 or word.lower() in ABBREVIATIONS:
+            return False
+    return True
+
+
+def _capitalize_sentences(text):
+    # Whitespace is already collapsed to single spaces
+    tokens = text.split(" ")
+    for i, token in enumerate(tokens):
+        if token and (i == 0 or _ends_sentence(tokens[i - 1])):
+            tokens[i] = token[0].upper() + token[1:]
+    return " ".join(tokens)
+
+
+def count_disfluencies(text, language=None):
+    """Number of filler words and repeated-word runs the rules would remove."""
+    filler_re = FILLER_RE.get(language, FILLER_RE[None])
+    return len(filler_re.findall(text)) + len(REPEATED_WORD_RE.findall(text))
+
+
+def clean_text(text, language=None):
+    """
+    Rule-based cleanup without an LLM: removes fillers, collapses repeated
+    words, normalises punctuation spacing and capitalises sentences.
+    """
+    if not text:
+        return text
+
+    filler_re = FILLER_RE.get(language, FILLER_RE[None])
+    text = filler_re.sub(" ", text)
+    text = REPEATED_WORD_RE.sub(r"\1", text)
+
+    text = WHITESPACE_RE.sub(" ", text)
+    text = STRANDED_PUNCT_RE.sub(_stranded_punct, text)
+    text = SPACE_BEFORE_PUNCT_RE.sub(r"\1", text)
+    text = REPEATED_COMMA_RE.sub(",", text)
+    text = SPACE_AFTER_PUNCT_RE.sub(r"\1 ", text)
+    text = text.lstrip(" ,;:.!?…").rstrip(" ,;:")
+    if not text:
+        return text
+
+    if language in (None, "en"):
+        text = STANDALONE_I_RE.sub("I", text)
+    text = _capitalize_sentences(text)
+    if text[-1].isalnum():
+        text += "."
+    return text
+
+
+def is_clean(text, language=None):
+    """True if the text already has sentence punctuation and nothing for the rules to remove."""
+    return bool(SENTENCE_PUNCT_RE.search(text)) and count_disfluencies(text, language) == 0
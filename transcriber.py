@@ -4,8 +4,12 @@ import os
 import logging
 import shutil
 import sys
+import time
+import threading
 import wavio
 import numpy as np
+from model_cache import load_cached_model, DEFAULT_CACHE_DIR
+from model_cascade import RealTimeFactorTable, speech_duration, is_low_confidence, select_model
 
 # Fix for PyInstaller --noconsole removing stdout/stderr
 class NullWriter:
@@ -20,8 +24,26 @@ if sys.stderr is None:
     sys.stderr = NullWriter()
 
 class Transcriber:
-    def __init__(self, model_size="base", device="auto"):
+    def __init__(self, model_size="base", device="auto", use_cache=True, cache_dir=None,
+                 cascade=None, latency_budget=2.0, latency_budget_rtf=0.5, escalate=True, rtf_path=None, on_status=None):
         self.model = None
+        # Cascade mode: model sizes ordered small to large, picked per clip.
+        # The smallest one is the primary model; the others load lazily once a clip needs them.
+        self.cascade = list(cascade or [])
+        if self.cascade:
+            model_size = self.cascade[0]
+        self.model_size = model_size
+        self.use_cache = use_cache
+        self.cache_dir = cache_dir
+        # Allowed transcription time per clip: latency_budget + latency_budget_rtf * speech seconds
+        self.latency_budget = latency_budget
+        self.latency_budget_rtf = latency_budget_rtf
+        self.escalate = escalate
+        self.on_status = on_status
+        self.models = {}
+        self._loading = set()
+        self._models_lock = threading.Lock()
+        self._closed = False
         
         if device == "auto":
             self.device = "cuda" if torch.cuda.is_available() else "cpu"
@@ -30,7 +52,7 @@ class Transcriber:
             
         logging.info(f"Loading Whisper model '{model_size}' on {self.device}...")
         try:
-            self.model = whisper.load_model(model_size, device=self.device)
+            self.model = self._load_model(model_size)
             logging.info("Model loaded successfully.")
         except Exception as e:
             logging.error(f"Failed to load model on {self.device}: {e}")
@@ -38,7 +60,7 @@ class Transcriber:
                 logging.info("Falling back to cpu...")
                 self.device = "cpu"
                 try:
-                    self.model = whisper.load_model(model_size, device=self.device)
+                    self.model = self._load_model(model_size)
                     logging.info("Model loaded on CPU fallback.")
                 except Exception as ex_cpu:
                     logging.critical(f"Failed to load model on CPU: {ex_cpu}")
@@ -46,7 +68,61 @@ class Transcriber:
             else:
                 self.model = None
 
-    def transcribe(self, audio_path, language=None):
+        if self.model:
+            self.models[model_size] = self.model
+        if self.cascade and self.model:
+            self.rtf_table = RealTimeFactorTable(
+                rtf_path or os.path.join(os.path.dirname(DEFAULT_CACHE_DIR), "rtf_table.json"),
+                device=self.device
+            )
+
+    def _status(self, message):
+        logging.info(message)
+        if self.on_status:
+            self.on_status(message)
+
+    def _load_in_background(self, model_size):
+        """Starts loading a cascade model the first time a clip would need it."""
+        with self._models_lock:
+            if self._closed or model_size in self.models or model_size in self._loading:
+                return
+            self._loading.add(model_size)
+        self._status(f"Loading '{model_size}' model in background...")
+        threading.Thread(target=self._background_load, args=(model_size,), name="CascadeLoad", daemon=True).start()
+
+    def _background_load(self, model_size):
+        try:
+            model = None if self._closed else self._load_model(model_size)
+            with self._models_lock:
+                # Dropped if the transcriber was closed (e.g. a different model was chosen) meanwhile
+                if model is not None and not self._closed:
+                    self.models[model_size] = model
+                    self._status(f"'{model_size}' model ready.")
+        except Exception as e:
+            logging.error(f"Failed to load cascade model '{model_size}': {e}")
+        finally:
+            with self._models_lock:
+                self._loading.discard(model_size)
+
+    def close(self):
+        """Cancels pending cascade loads and releases the models."""
+        with self._models_lock:
+            self._closed = True
+            self.models = {}
+        self.model = None
+
+    def _load_model(self, model_size):
+        if self.use_cache:
+            # Half precision only where decoding runs in fp16 (CUDA); CPU decoding needs fp32 weights
+            dtype = torch.float16 if self.device == "cuda" else torch.float32
+            try:
+                return load_cached_model(model_size, device=self.device, dtype=dtype, cache_dir=self.cache_dir)
+            except Exception as e:
+                logging.warning(f"Checkpoint cache unavailable, loading stock checkpoint: {e}")
+        return whisper.load_model(model_size, device=self.device)
+
+    def transcribe(self, audio_path, language=None, start=0):
+        """Transcribes a WAV file, skipping its first `start` samples (e.g. audio already transcribed)."""
         if not self.model:
              logging.error("Transcriber model is not initialized.")
              return None
@@ -72,8 +148,27 @@ class Transcriber:
                 data = (data.astype(np.float32) - 128) / 128.0
             
             # Flatten to 1D array (mono)
-            data = data.flatten()
-            
+            data = data.flatten()[start:]
+        except Exception as e:
+            logging.error(f"Error reading audio: {e}")
+            return None
+
+        if len(data) == 0:
+            return ""
+        return self.transcribe_array(data, language=language)
+
+    def transcribe_array(self, data, language=None):
+        """Transcribes a mono float32 array sampled at 16kHz."""
+        result = self.transcribe_result(data, language=language)
+        return result["text"].strip() if result else None
+
+    def transcribe_result(self, data, language=None):
+        """Like transcribe_array, but returns Whisper's full result (text and timed segments)."""
+        if not self.model:
+             logging.error("Transcriber model is not initialized.")
+             return None
+
+        try:
             # Whisper expects 16kHz audio. 
             # We assume AudioRecorder recorded at 16kHz (see audio_recorder.py default).
             
@@ -81,8 +176,44 @@ class Transcriber:
             if language:
                 options["language"] = language
             
-            result = self.model.transcribe(data, **options)
-            return result["text"].strip()
+            if self.cascade:
+                result = self._transcribe_cascade(data, options)
+            else:
+                result = self.model.transcribe(data, **options)
+            return result
         except Exception as e:
             logging.error(f"Error during transcription: {e}")
             return None
+
+    def _timed_transcribe(self, model_size, data, options, seconds):
+        started = time.time()
+        result = self.models[model_size].transcribe(data, **options)
+        self.rtf_table.update(model_size, time.time() - started, seconds)
+        return result
+
+    def _transcribe_cascade(self, data, options):
+        """
+        Picks the largest cascade model expected to finish within the latency
+        budget for this clip's speech duration (the budget grows with the
+        clip), and optionally retries on the largest loaded model when the
+        result looks unreliable. A model that is not loaded yet is loaded in
+        the background and this clip uses the best loaded one instead.
+        """
+        seconds = speech_duration(data)
+        target = select_model(self.cascade, seconds, self.latency_budget, self.rtf_table, self.latency_budget_rtf)
+        self._load_in_background(target)
+        available = [m for m in self.cascade if m in self.models] or [self.model_size]
+        model_size = select_model(available, seconds, self.latency_budget, self.rtf_table, self.latency_budget_rtf)
+        logging.info(f"Cascade: {seconds:.1f}s of speech -> '{model_size}' (target '{target}')")
+        result = self._timed_transcribe(model_size, data, options, seconds)
+
+        if self.escalate and is_low_confidence(result) and model_size in self.cascade:
+            larger = self.cascade[self.cascade.index(model_size) + 1:]
+            loaded = [m for m in larger if m in self.models]
+            if larger and larger[-1] not in self.models:
+                # Not worth a synchronous load; have the largest model ready for the next hard clip
+                self._load_in_background(larger[-1])
+            if loaded:
+                logging.info(f"Cascade: low confidence from '{model_size}', re-running on '{loaded[-1]}'")
+                result = self._timed_transcribe(loaded[-1], data, options, seconds)
+        return result
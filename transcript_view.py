@@ -0,0 +1,98 @@
+from PyQt6.QtWidgets import QTextEdit
+from PyQt6.QtCore import QTimer
+from PyQt6.QtGui import QTextCursor, QTextCharFormat, QColor
+
+STABILITY_COLORS = {
+    "h1": "#808080", # Grey
+    "h3": "#a0a0a0", # Darker Grey
+}
+COMMITTED_COLOR = "#ffffff" # White
+UNSTABLE = ("h1", "h3")
+
+
+class TranscriptView(QTextEdit):
+    """
+    Read-only transcript made of a committed prefix (one block per final result)
+    and a single unstable tail block that is replaced in place by each partial.
+
+    Updates are queued and applied at most once per frame inside one edit block,
+    and the document keeps at most max_blocks blocks so long sessions stay cheap
+    to lay out. The full committed text is kept separately for copy/history.
+    """
+    def __init__(self, parent=None, fps=60, max_blocks=2000):
+        super().__init__(parent)
+        self.setReadOnly(True)
+        self.setUndoRedoEnabled(False)
+        self.document().setMaximumBlockCount(max_blocks)
+
+        self._committed = []
+        self._tail = ""
+        self._pending = []
+
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setSingleShot(True)
+        self._flush_timer.setInterval(max(1, int(1000 / fps)))
+        self._flush_timer.timeout.connect(self.flush)
+
+    def submit(self, text, stability="final"):
+        """Queues a result; h1/h3 replace the unstable tail, anything else commits."""
+        self._pending.append((text, stability))
+        if not self._flush_timer.isActive():
+            self._flush_timer.start()
+
+    def flush(self):
+        self._flush_timer.stop()
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, []
+
+        # Only the last partial after the last commit is ever visible
+        commits = []
+        tail = None
+        for text, stability in pending:
+            if stability in UNSTABLE:
+                tail = (text, stability)
+            else:
+                commits.append(text)
+                tail = None
+
+        scrollbar = self.verticalScrollBar()
+        at_bottom = scrollbar.value() >= scrollbar.maximum() - 4
+
+        cursor = QTextCursor(self.document())
+        cursor.beginEditBlock()
+        for text in commits:
+            self._replace_tail(cursor, text, COMMITTED_COLOR)
+            cursor.insertBlock()
+            self._committed.append(text)
+            self._tail = ""
+        if tail is not None:
+            self._replace_tail(cursor, tail[0], STABILITY_COLORS[tail[1]])
+            self._tail = tail[0]
+        cursor.endEditBlock()
+
+        if at_bottom:
+            scrollbar.setValue(scrollbar.maximum())
+
+    def _replace_tail(self, cursor, text, color):
+        # The tail always lives alone in the last block
+        cursor.movePosition(QTextCursor.MoveOperation.End)
+        cursor.movePosition(QTextCursor.MoveOperation.StartOfBlock, QTextCursor.MoveMode.KeepAnchor)
+        fmt = QTextCharFormat()
+        fmt.setForeground(QColor(color))
+        cursor.insertText(text, fmt)
+
+    def plain_text(self):
+        """Committed text plus the current tail, including blocks trimmed from the view."""
+        self.flush()
+        parts = list(self._committed)
+        if self._tail:
+            parts.append(self._tail)
+        return "\n".join(parts)
+
+    def clear(self):
+        self._flush_timer.stop()
+        self._pending = []
+        self._committed = []
+        self._tail = ""
+        super().clear()
@@ -1,21 +1,10 @@
 import pyperclip
-import threading
-from plyer import notification
+from notifications import get_dispatcher
 
 def copy_to_clipboard(text):
     pyperclip.copy(text)
 
-def notify_user(title, message):
-    # Run notification in a separate thread to not block main execution
-    def _notify():
-        try:
-            notification.notify(
-                title=title,
-                message=message,
-                app_name="HelpMyToAnswer",
-                timeout=3
-            )
-        except Exception as e:
-            print(f"Notification error: {e}")
-            
-    threading.Thread(target=_notify).start()
+def notify_user(title, message, kind="status", toast=True):
+    # Hand off to the shared dispatcher thread instead of spawning a thread per toast.
+    # Status messages are coalesced; use kind="result" or "error" for messages that must be shown.
+    get_dispatcher().publish(message, title=title, kind=kind, toast=toast)